@@ -17,19 +17,289 @@
 #  Date Created: 10/20/2023
 
 #  Date Last Modified: 10/23/2023
+import argparse
+import json
+import os
+import random
+import struct
 import sys
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+#  Count the ways to finish a board of size n whose first col columns
+#  are filled; rows, down and up mark the attacked rows in column col
+def count_completions(n, col, rows, down, up):
+    if col >= n:
+        return 1
+    full = (1 << n) - 1
+    last = n - 1
+
+    def count(col, rows, down, up):
+        free = full & ~(rows | down | up)
+        if col == last:
+            return 1 if free else 0
+        total = 0
+        col += 1
+        while free:
+            bit = free & -free  # lowest free row
+            free ^= bit
+            total += count(col, rows | bit, (down | bit) << 1,
+                           (up | bit) >> 1)
+        return total
+
+    return count(col, rows, down, up)
+
+#  Worker entry point for Queens.parallel_solve
+def count_prefix(task):
+    return count_completions(*task)
+
+#  Input: rows, a sequence with rows[col] the row of the queen in col
+#  Output: True if no two queens attack each other. Uses one set per
+#          line direction, never an n x n board
+def is_solution(rows):
+    n = len(rows)
+    cols = range(n)
+    if len(set(rows)) != n or (n and (min(rows) < 0 or max(rows) >= n)):
+        return False
+    return (len(set(map(int.__sub__, rows, cols))) == n and
+            len(set(map(int.__add__, rows, cols))) == n)
+
+#  Packed solution files: magic, board size, then n signed bytes per
+#  solution holding the row of the queen in each column
+SOLUTION_MAGIC = b'NQSL'
+SOLUTION_HEADER = struct.Struct('<4sH')
+
+#  Input: path to a file written by Queens.write_solutions
+#  Output: yields each solution as an array('b') of row indices
+def read_solutions(path):
+    with open(path, 'rb') as f:
+        magic, n = SOLUTION_HEADER.unpack(f.read(SOLUTION_HEADER.size))
+        if magic != SOLUTION_MAGIC:
+            raise ValueError('%s is not a packed solution file' % path)
+        size = max(n, 1)
+        while True:
+            chunk = f.read(size * 4096)
+            if not chunk:
+                break
+            for i in range(0, len(chunk), size):
+                yield array('b', chunk[i:i + n])
+
+#  Exact cover by Knuth's Algorithm X with dancing links. Primary items
+#  must be covered exactly once, secondary items at most once. The links
+#  live in flat lists indexed by node; node 0 is the root and nodes
+#  1..len(items) are the item headers
+class ExactCover(object):
+    def __init__(self, primary, secondary=()):
+        primary = list(primary)
+        self.items = primary + list(secondary)
+        self.item_index = {item: i + 1 for i, item in enumerate(self.items)}
+        count = len(self.items)
+        num_primary = len(primary)
+
+        # Primary headers form a circular list with the root; secondary
+        # headers link only to themselves so they are never chosen
+        self.left = [0] * (count + 1)
+        self.right = [0] * (count + 1)
+        for i in range(num_primary + 1):
+            self.left[i] = i - 1 if i > 0 else num_primary
+            self.right[i] = i + 1 if i < num_primary else 0
+        for i in range(num_primary + 1, count + 1):
+            self.left[i] = self.right[i] = i
+        self.up = list(range(count + 1))
+        self.down = list(range(count + 1))
+        self.column = list(range(count + 1))
+        self.size = [0] * (count + 1)
+        self.option_of = [-1] * (count + 1)
+
+        self.options = []   # option names
+        self.first = []     # first node of each option
+        self.option_index = {}
+        self.chosen = []    # options fixed with select
+
+    #  Add an option covering the given items
+    def add_option(self, name, items):
+        index = len(self.options)
+        self.options.append(name)
+        self.option_index[name] = index
+        self.first.append(len(self.column))
+        start = len(self.column)
+        for item in items:
+            node = len(self.column)
+            col = self.item_index[item]
+            self.column.append(col)
+            self.option_of.append(index)
+            self.up.append(self.up[col])
+            self.down.append(col)
+            self.down[self.up[col]] = node
+            self.up[col] = node
+            self.size[col] += 1
+            self.left.append(node - 1)
+            self.right.append(node + 1)
+        end = len(self.column) - 1
+        if end >= start:
+            self.left[start] = end
+            self.right[end] = start
+        return index
+
+    def cover(self, col):
+        left, right, up, down = self.left, self.right, self.up, self.down
+        column, size = self.column, self.size
+        right[left[col]] = right[col]
+        left[right[col]] = left[col]
+        i = down[col]
+        while i != col:
+            j = right[i]
+            while j != i:
+                up[down[j]] = up[j]
+                down[up[j]] = down[j]
+                size[column[j]] -= 1
+                j = right[j]
+            i = down[i]
+
+    def uncover(self, col):
+        left, right, up, down = self.left, self.right, self.up, self.down
+        column, size = self.column, self.size
+        i = up[col]
+        while i != col:
+            j = left[i]
+            while j != i:
+                size[column[j]] += 1
+                up[down[j]] = j
+                down[up[j]] = j
+                j = left[j]
+            i = up[i]
+        right[left[col]] = col
+        left[right[col]] = col
+
+    #  Nodes of an option, starting with its first node
+    def option_nodes(self, index):
+        node = self.first[index]
+        nodes = [node]
+        j = self.right[node]
+        while j != node:
+            nodes.append(j)
+            j = self.right[j]
+        return nodes
+
+    #  Fix an option as part of every solution before searching.
+    #  Returns False if it shares an item with an option fixed earlier
+    def select(self, name):
+        index = self.option_index[name]
+        covered = set()
+        for chosen in self.chosen:
+            covered.update(self.column[j] for j in self.option_nodes(chosen))
+        nodes = self.option_nodes(index)
+        if any(self.column[j] in covered for j in nodes):
+            return False
+        for j in nodes:
+            self.cover(self.column[j])
+        self.chosen.append(index)
+        return True
+
+    #  Primary item with the fewest remaining options, or 0 if all are
+    #  covered
+    def choose_item(self):
+        best, best_size = 0, None
+        col = self.right[0]
+        while col != 0:
+            if best_size is None or self.size[col] < best_size:
+                best, best_size = col, self.size[col]
+                if best_size <= 1:
+                    break
+            col = self.right[col]
+        return best
+
+    #  Number of exact covers that include the selected options
+    def count(self):
+        right, down, column = self.right, self.down, self.column
+
+        def search():
+            col = self.choose_item()
+            if col == 0:
+                return 1
+            total = 0
+            self.cover(col)
+            r = down[col]
+            while r != col:
+                j = right[r]
+                while j != r:
+                    self.cover(column[j])
+                    j = right[j]
+                total += search()
+                j = self.left[r]
+                while j != r:
+                    self.uncover(column[j])
+                    j = self.left[j]
+                r = down[r]
+            self.uncover(col)
+            return total
+
+        return search()
+
+    #  Yield each exact cover as a list of option names, selected
+    #  options first, stopping after limit solutions if given
+    def solutions(self, limit=None):
+        left, right, down = self.left, self.right, self.down
+        column = self.column
+        partial = [self.options[i] for i in self.chosen]
+        found = 0
+
+        def search():
+            nonlocal found
+            col = self.choose_item()
+            if col == 0:
+                found += 1
+                yield list(partial)
+                return
+            self.cover(col)
+            r = down[col]
+            while r != col and found != limit:
+                j = right[r]
+                while j != r:
+                    self.cover(column[j])
+                    j = right[j]
+                partial.append(self.options[self.option_of[r]])
+                yield from search()
+                partial.pop()
+                j = left[r]
+                while j != r:
+                    self.uncover(column[j])
+                    j = left[j]
+                r = down[r]
+            self.uncover(col)
+
+        if limit is None or limit > 0:
+            yield from search()
 
 class Queens(object):
-    def __init__(self, n=8):
+    def __init__(self, n=8, mode='bitmask', workers=None, checkpoint=None):
         self.board = []
         self.n = n
+        self.mode = mode
+        self.workers = workers
+        self.checkpoint = checkpoint
+        self.solutions = 0  # Initialize the solution count
+        self.distinct = 0   # Solutions unique up to rotation/reflection
+        self.orbits = {}    # Orbit size -> number of distinct solutions
+
+    # Build the string board used by the backtracking solver and render
+    def make_board(self):
+        self.board = []
         for i in range(self.n):
             row = []
             for j in range(self.n):
                 row.append('*')
             self.board.append(row)
-        self.solutions = 0  # Initialize the solution count
 
+    # Debug renderer: rows[col] is the row of the queen in column col
+    def render(self, rows):
+        self.make_board()
+        for col, row in enumerate(rows):
+            self.board[row][col] = 'Q'
+        lines = [' '.join(row) for row in self.board]
+        self.make_board()
+        return '\n'.join(lines)
 
 
     # Check if a position on the board is valid
@@ -57,24 +327,555 @@ class Queens(object):
                     self.recursive_solve(col + 1)
                     self.board[i][col] = '*'
 
-    # If the problem has a solution, print the board
+    #  Board states after placing queens in the first depth columns, as
+    #  (weight, rows, down, up). Only the top half of the first column
+    #  is used; weight 2 counts the mirror image in the bottom half
+    def prefixes(self, depth):
+        full = (1 << self.n) - 1
+        states = []
+        for row in range((self.n + 1) // 2):
+            weight = 1 if 2 * row == self.n - 1 else 2
+            bit = 1 << row
+            states.append((weight, bit, bit << 1, bit >> 1))
+        for col in range(1, depth):
+            expanded = []
+            for weight, rows, down, up in states:
+                free = full & ~(rows | down | up)
+                while free:
+                    bit = free & -free
+                    free ^= bit
+                    expanded.append((weight, rows | bit, (down | bit) << 1,
+                                     (up | bit) >> 1))
+            states = expanded
+        return states
+
+    #  Count solutions with columns and both diagonal directions kept
+    #  as integer bitmasks; bit i of each mask stands for row i
+    def bitmask_solve(self):
+        if self.n <= 1:
+            self.solutions = 1
+            return
+        total = 0
+        for weight, rows, down, up in self.prefixes(1):
+            total += weight * count_completions(self.n, 1, rows, down, up)
+        self.solutions = total
+
+    #  Yield solutions in lexicographic order as tuples (or array('b')
+    #  when packed) with rows[col] the row of the queen in column col.
+    #  The search keeps one mask per column instead of a board, so
+    #  memory stays O(n) however many solutions are produced
+    def iter_solutions(self, limit=None, offset=0, packed=False):
+        n = self.n
+        if packed and n > 127:
+            raise ValueError('packed solutions hold row indices below 128')
+        if limit is not None and limit <= 0:
+            return
+        if n == 0:
+            if offset == 0:
+                yield array('b') if packed else ()
+            return
+        full = (1 << n) - 1
+        last = n - 1
+        placed = [0] * n
+        rows = [0] * n
+        down = [0] * n
+        up = [0] * n
+        free = [0] * n
+        free[0] = full
+        col = 0
+        skipped = produced = 0
+        while col >= 0:
+            f = free[col]
+            if not f:
+                col -= 1
+                continue
+            bit = f & -f
+            free[col] = f ^ bit
+            placed[col] = bit.bit_length() - 1
+            if col == last:
+                if skipped < offset:
+                    skipped += 1
+                    continue
+                yield array('b', placed) if packed else tuple(placed)
+                produced += 1
+                if produced == limit:
+                    return
+                continue
+            r = rows[col] | bit
+            d = ((down[col] | bit) << 1) & full
+            u = (up[col] | bit) >> 1
+            col += 1
+            rows[col], down[col], up[col] = r, d, u
+            free[col] = full & ~(r | d | u)
+
+    #  Stream solutions to path in the packed format read back by
+    #  read_solutions, buffering a bounded number of bytes at a time;
+    #  returns the number of solutions written
+    def write_solutions(self, path, limit=None, offset=0, buffer_size=1 << 16):
+        written = 0
+        buf = array('b')
+        with open(path, 'wb') as f:
+            f.write(SOLUTION_HEADER.pack(SOLUTION_MAGIC, self.n))
+            for rows in self.iter_solutions(limit, offset, packed=True):
+                buf.extend(rows)
+                written += 1
+                if len(buf) >= buffer_size:
+                    buf.tofile(f)
+                    buf = array('b')
+            buf.tofile(f)
+        return written
+
+    #  Number of leading columns used to split the search into subtrees
+    def split_depth(self):
+        return min(3 if self.n >= 10 else 2, self.n)
+
+    #  Split the search into the placements of the first few columns
+    #  and count those subtrees in a pool of worker processes
+    def parallel_solve(self, workers=None):
+        if self.n <= 1:
+            self.solutions = 1
+            return
+        depth = self.split_depth()
+        states = self.prefixes(depth)
+        tasks = [(self.n, depth, rows, down, up)
+                 for weight, rows, down, up in states]
+
+        # Small chunks let idle workers pick up the remaining subtrees
+        # when some prefixes turn out much larger than others
+        workers = workers or os.cpu_count() or 1
+        chunksize = max(1, len(tasks) // (workers * 8))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            counts = list(executor.map(count_prefix, tasks,
+                                       chunksize=chunksize))
+
+        self.solutions = sum(state[0] * num
+                             for state, num in zip(states, counts))
+
+    #  Read the finished subtrees of an earlier run from a checkpoint
+    #  file, as a dict of prefix index -> count
+    def load_checkpoint(self, path, depth, total):
+        if not os.path.exists(path):
+            return {}
+        with open(path) as f:
+            state = json.load(f)
+        key = (state['n'], state['depth'], state['total'])
+        if key != (self.n, depth, total):
+            raise ValueError('checkpoint %s was written for a different board'
+                             % path)
+        return {int(i): num for i, num in state['done'].items()}
+
+    #  Write the finished subtrees to a temporary file and rename it
+    #  over the checkpoint, so a crash never leaves a partial file
+    def save_checkpoint(self, path, depth, states, done):
+        partial = sum(states[i][0] * num for i, num in done.items())
+        state = {'n': self.n, 'depth': depth, 'total': len(states),
+                 'partial': partial, 'done': done}
+        tmp = path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(state, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+    #  Count subtree by subtree, saving finished prefixes to the
+    #  checkpoint file every interval seconds; a rerun with the same
+    #  file only counts the prefixes that are still missing
+    def resumable_solve(self, path, workers=1, interval=30.0,
+                        report=sys.stderr):
+        if self.n <= 1:
+            self.solutions = 1
+            return
+        depth = self.split_depth()
+        states = self.prefixes(depth)
+        done = self.load_checkpoint(path, depth, len(states))
+        pending = [i for i in range(len(states)) if i not in done]
+        start = last_save = time.time()
+        finished = 0
+
+        def record(i, num):
+            nonlocal finished, last_save
+            done[i] = num
+            finished += 1
+            now = time.time()
+            if now - last_save < interval:
+                return
+            # Progress goes out once per checkpoint, not per subtree
+            self.save_checkpoint(path, depth, states, done)
+            last_save = now
+            if report is not None:
+                eta = (now - start) / finished * (len(pending) - finished)
+                report.write('%d/%d subtrees, ETA %.0fs\n'
+                             % (len(done), len(states), eta))
+
+        def task(i):
+            return (self.n, depth) + states[i][1:]
+
+        if workers == 1:
+            for i in pending:
+                record(i, count_prefix(task(i)))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = {executor.submit(count_prefix, task(i)): i
+                           for i in pending}
+                for future in as_completed(futures):
+                    record(futures[future], future.result())
+
+        self.save_checkpoint(path, depth, states, done)
+        if report is not None:
+            report.write('%d/%d subtrees, done in %.0fs\n'
+                         % (len(done), len(states), time.time() - start))
+        self.solutions = sum(states[i][0] * num for i, num in done.items())
+
+    #  One solution in O(n) time from the explicit construction: even
+    #  rows then odd rows, patched for n % 6 == 2 or 3. Returns None
+    #  for n = 2 and 3, which have no solution
+    def construct(self):
+        n = self.n
+        if n in (2, 3):
+            return None
+        evens = list(range(1, n, 2))    # rows 2, 4, ... counted from 1
+        odds = list(range(0, n, 2))     # rows 1, 3, ...
+        if n % 6 == 2:
+            odds[0], odds[1] = odds[1], odds[0]
+            odds.append(odds.pop(2))
+        elif n % 6 == 3:
+            evens.append(evens.pop(0))
+            odds = odds[2:] + odds[:2]
+        return array('i', evens + odds)
+
+    #  Local search for one solution: start from a random permutation
+    #  and swap queens in attacked columns with random partners while
+    #  that lowers the number of diagonal collisions. Memory is O(n);
+    #  returns None if max_steps swaps are tried without success
+    def min_conflicts(self, max_steps=None, seed=None):
+        n = self.n
+        if n in (2, 3):
+            return None
+        rng = random.Random(seed)
+        down = [0] * (2 * n)
+        up = [0] * (2 * n)
+
+        def move(col, row, step):
+            # Change in collisions from adding (step=1) or removing
+            # (step=-1) a queen, applied to the diagonal counts
+            d, u = row - col + n, row + col
+            if step < 0:
+                down[d] -= 1
+                up[u] -= 1
+                return -((down[d] > 0) + (up[u] > 0))
+            change = (down[d] > 0) + (up[u] > 0)
+            down[d] += 1
+            up[u] += 1
+            return change
+
+        steps = 0
+        collisions = 1
+        while collisions:
+            # Random restart, also taken after 8n swaps in a row that
+            # fail to lower the collisions. Each column greedily draws
+            # a few unused rows looking for one off every attacked
+            # diagonal, which leaves only a handful of collisions
+            rows = list(range(n))
+            down[:] = up[:] = [0] * (2 * n)
+            collisions = 0
+            for col in range(n):
+                for _ in range(16):
+                    j = rng.randrange(col, n)
+                    row = rows[j]
+                    if not down[row - col + n] and not up[row + col]:
+                        break
+                rows[col], rows[j] = rows[j], rows[col]
+                collisions += move(col, rows[col], 1)
+            failed = 0
+            while collisions and failed < 8 * n:
+                attacked = [i for i in range(n) if down[rows[i] - i + n] > 1
+                            or up[rows[i] + i] > 1]
+                for i in attacked:
+                    while ((down[rows[i] - i + n] > 1 or up[rows[i] + i] > 1)
+                           and failed < 8 * n):
+                        if max_steps is not None and steps >= max_steps:
+                            return None
+                        steps += 1
+                        j = rng.randrange(n)
+                        a, b = rows[i], rows[j]
+                        change = (move(i, a, -1) + move(j, b, -1) +
+                                  move(i, b, 1) + move(j, a, 1))
+                        if change < 0:
+                            rows[i], rows[j] = b, a
+                            collisions += change
+                            failed = 0
+                        else:
+                            move(i, b, -1)
+                            move(j, a, -1)
+                            move(i, a, 1)
+                            move(j, b, 1)
+                            failed += 1
+        return array('i', rows)
+
+    #  One solution for boards far too large to search, from the
+    #  construction, falling back to min-conflicts if it fails to verify
+    def one_solution(self, seed=None):
+        rows = self.construct()
+        if rows is not None and not is_solution(rows):
+            rows = self.min_conflicts(seed=seed)
+        return rows
+
+    #  Exact-cover form of the board: rows and columns must hold one
+    #  queen each, diagonals at most one. Options are the squares that
+    #  are not blocked, named (row, col)
+    def cover_problem(self, placed=(), blocked=()):
+        n = self.n
+        primary = ([('row', i) for i in range(n)] +
+                   [('col', i) for i in range(n)])
+        secondary = ([('down', i) for i in range(2 * n - 1)] +
+                     [('up', i) for i in range(2 * n - 1)])
+        problem = ExactCover(primary, secondary)
+        blocked = set(blocked)
+        for row in range(n):
+            for col in range(n):
+                if (row, col) not in blocked:
+                    problem.add_option((row, col), [
+                        ('row', row), ('col', col),
+                        ('down', row - col + n - 1), ('up', row + col)])
+        for square in placed:
+            if square in blocked or not problem.select(square):
+                return None
+        return problem
+
+    #  Count the completions of a board with queens already on the
+    #  placed squares and no queens allowed on the blocked ones
+    def constrained_solve(self, placed=(), blocked=()):
+        problem = self.cover_problem(placed, blocked)
+        self.solutions = 0 if problem is None else problem.count()
+        return self.solutions
+
+    #  Yield the completions of such a board as tuples of row indices
+    def iter_constrained(self, placed=(), blocked=(), limit=None):
+        problem = self.cover_problem(placed, blocked)
+        if problem is None:
+            return
+        for squares in problem.solutions(limit):
+            rows = [0] * self.n
+            for row, col in squares:
+                rows[col] = row
+            yield tuple(rows)
+
+    #  The eight rotations and reflections of a solution, where
+    #  rows[col] is the row of the queen in column col
+    def symmetries(self, rows):
+        inverse = [0] * self.n
+        for col, row in enumerate(rows):
+            inverse[row] = col
+        images = []
+        for s in (tuple(rows), tuple(inverse)):
+            flipped = tuple(self.n - 1 - row for row in s)
+            images.extend((s, s[::-1], flipped, flipped[::-1]))
+        return images
+
+    #  Count each symmetry class once while searching, never building
+    #  the eight images of a solution.  Solutions with a queen in a
+    #  corner are searched with that queen at (0, 0) and the second one
+    #  below the diagonal; they always have 8 distinct images.  The rest
+    #  are searched with the first queen strictly inside the top half of
+    #  column 0, and rows and columns near the borders are pruned so
+    #  that only solutions whose column 0 queen is the smallest border
+    #  queen can complete.  Each leaf then compares the board with its
+    #  rotations, bit by bit, to find its class size
+    def symmetry_solve(self):
+        n = self.n
+        if n <= 3:
+            self.orbits = {1: 1} if n <= 1 else {}
+            self.solutions = self.distinct = len(self.orbits)
+            return
+        last = n - 1
+        full = (1 << n) - 1
+        top = 1 << last
+        side = top | 1          # the first and last rows
+        placed = [0] * n        # placed[col] is the row bit of its queen
+        count = {2: 0, 4: 0, 8: 0}
+
+        # Is the finished board the smallest image of its class, and with
+        # how many distinct images
+        def check(bound1, bound2, endbit):
+            if placed[bound2] == 1:
+                # Compare with the board turned by 90 degrees
+                target = 2
+                col = 1
+                while col <= last:
+                    bit = 1
+                    other = last
+                    while placed[other] != target and placed[col] >= bit:
+                        bit <<= 1
+                        other -= 1
+                    if placed[col] > bit:
+                        return
+                    if placed[col] < bit:
+                        break
+                    col += 1
+                    target <<= 1
+                if col > last:
+                    count[2] += 1
+                    return
+            if placed[last] == endbit:
+                # Compare with the board turned by 180 degrees
+                other = last - 1
+                col = 1
+                while col <= last:
+                    bit = 1
+                    target = top
+                    while target != placed[other] and placed[col] >= bit:
+                        bit <<= 1
+                        target >>= 1
+                    if placed[col] > bit:
+                        return
+                    if placed[col] < bit:
+                        break
+                    col += 1
+                    other -= 1
+                if col > last:
+                    count[4] += 1
+                    return
+            if placed[bound1] == top:
+                # Compare with the board turned by 270 degrees
+                target = top >> 1
+                col = 1
+                while col <= last:
+                    bit = 1
+                    other = 0
+                    while placed[other] != target and placed[col] >= bit:
+                        bit <<= 1
+                        other += 1
+                    if placed[col] > bit:
+                        return
+                    if placed[col] < bit:
+                        break
+                    col += 1
+                    target >>= 1
+            count[8] += 1
+
+        # Boards with a queen in the corner; row 1 stays empty before
+        # column bound1 so the mirrored board is never counted again
+        def corner(col, rows, down, up, bound1):
+            free = full & ~(rows | down | up)
+            if col == last:
+                if free:
+                    count[8] += 1
+                return
+            if col < bound1:
+                free &= ~2
+            col += 1
+            while free:
+                bit = free & -free
+                free ^= bit
+                corner(col, rows | bit, (down | bit) << 1, (up | bit) >> 1,
+                       bound1)
+
+        # Boards without one; the first and last rows stay empty before
+        # column bound1, and column bound2 must meet the side rows the
+        # column 0 queen allows
+        def inner(col, rows, down, up, bound1, bound2, lastmask, endbit):
+            free = full & ~(rows | down | up)
+            if col == last:
+                if free and not free & lastmask:
+                    placed[col] = free
+                    check(bound1, bound2, endbit)
+                return
+            if col < bound1:
+                free &= ~side
+            elif col == bound2:
+                if not rows & side:
+                    return
+                if rows & side != side:
+                    free &= side
+            while free:
+                bit = free & -free
+                free ^= bit
+                placed[col] = bit
+                inner(col + 1, rows | bit, (down | bit) << 1, (up | bit) >> 1,
+                      bound1, bound2, lastmask, endbit)
+
+        # Queen in the corner of column 0, the next one below the diagonal
+        placed[0] = 1
+        for bound1 in range(2, last):
+            bit = placed[1] = 1 << bound1
+            corner(2, 1 | bit, (2 | bit) << 1, bit >> 1, bound1)
+
+        # First queen away from the corners, in the top half of column 0
+        lastmask = side
+        endbit = top >> 1
+        bound1, bound2 = 1, n - 2
+        while bound1 < bound2:
+            bit = placed[0] = 1 << bound1
+            inner(1, bit, bit << 1, bit >> 1, bound1, bound2, lastmask, endbit)
+            lastmask |= lastmask >> 1 | lastmask << 1
+            endbit >>= 1
+            bound1 += 1
+            bound2 -= 1
+
+        self.orbits = {size: num for size, num in count.items() if num}
+        self.distinct = sum(self.orbits.values())
+        self.solutions = sum(size * num for size, num in self.orbits.items())
+
+    # Count the solutions with the solver chosen by mode
     def solve(self):
-        self.recursive_solve(0)
+        self.solutions = 0
+        if self.checkpoint is not None:
+            self.resumable_solve(self.checkpoint, self.workers or 1)
+        elif self.mode == 'parallel':
+            self.parallel_solve(self.workers)
+        elif self.mode == 'backtrack':
+            self.make_board()
+            self.recursive_solve(0)
+        elif self.mode == 'symmetry':
+            self.symmetry_solve()
+        else:
+            self.bitmask_solve()
 
 def main():
+    parser = argparse.ArgumentParser(description='Count N-Queens solutions')
+    parser.add_argument('-w', '--workers', type=int, default=1,
+                        help='number of worker processes (0 = all cores)')
+    parser.add_argument('-c', '--checkpoint',
+                        help='file to save progress to and resume from')
+    parser.add_argument('-1', '--one', action='store_true',
+                        help='print one solution instead of counting')
+    parser.add_argument('-m', '--mode', default='bitmask',
+                        choices=('bitmask', 'backtrack', 'symmetry'),
+                        help='single process solver (default bitmask)')
+    parser.add_argument('-d', '--distinct', action='store_true',
+                        help='also print the number of solutions distinct '
+                             'under rotation and reflection (symmetry mode)')
+    args = parser.parse_args()
+    if args.distinct and (args.workers != 1 or args.checkpoint is not None):
+        parser.error('--distinct needs a single process run without --checkpoint')
+
     # Read the size of the board from the input file
     line = sys.stdin.readline()
     line = line.strip()
     n = int(line)
 
+    # Print the row of the queen in each column of one solution
+    if args.one:
+        rows = Queens(n).one_solution()
+        print('no solution' if rows is None else ' '.join(map(str, rows)))
+        return
+
     # Create a chess board
-    game = Queens(n)
+    if args.checkpoint is not None:
+        game = Queens(n, checkpoint=args.checkpoint,
+                      workers=args.workers or os.cpu_count())
+    elif args.workers == 1:
+        game = Queens(n, 'symmetry' if args.distinct else args.mode)
+    else:
+        game = Queens(n, 'parallel', args.workers or None)
 
     # Place the queens on the board and count the solutions
     game.solve()
 
     # Print the number of solutions
     print(game.solutions)
+    if args.distinct:
+        print(game.distinct)
 
 if __name__ == "__main__":
     main()
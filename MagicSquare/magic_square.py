@@ -1,5 +1,7 @@
 import sys
 
+import numpy as np
+
 # Populate a 2-D list with numbers from 1 to n2
 def make_square(n):
     square = [[0] * n for _ in range(n)]
@@ -18,6 +20,122 @@ def make_square(n):
 
     return square
 
+# Populate a doubly-even (n divisible by 4) square: count 1..n^2 row by
+# row, then replace the cells on the diagonals of every 4x4 block by
+# their complement n^2 + 1 - value
+def make_doubly_even(n):
+    square = [[i * n + j + 1 for j in range(n)] for i in range(n)]
+    for i in range(n):
+        for j in range(n):
+            if i % 4 == j % 4 or (i % 4) + (j % 4) == 3:
+                square[i][j] = n * n + 1 - square[i][j]
+    return square
+
+# Populate a singly-even (n = 4m + 2) square by Strachey's method: four
+# copies of an odd square of order n/2 offset by 0, 1, 2 and 3 quarters
+# of n^2, then swap some columns between the top and bottom halves
+def make_singly_even(n):
+    h = n // 2
+    quarter = make_square(h)
+    offsets = [[0, 2], [3, 1]]
+    square = [[quarter[i % h][j % h] + offsets[i // h][j // h] * h * h
+               for j in range(n)] for i in range(n)]
+    for i in range(h):
+        for j in range(n):
+            if strachey_swap(i, j, n):
+                square[i][j], square[i + h][j] = square[i + h][j], square[i][j]
+    return square
+
+# True if cell (i, j) of the top half trades places with (i + n/2, j) in
+# Strachey's method: the first m columns on the left (shifted one to the
+# right in the middle row) and the last m - 1 columns on the right
+def strachey_swap(i, j, n):
+    m = (n - 2) // 4
+    if j >= n - (m - 1):
+        return True
+    if i == m:
+        return 1 <= j <= m
+    return j < m
+
+# Populate a magic square of any order n other than 2
+def make_magic_square(n):
+    if n == 2:
+        raise ValueError("there is no magic square of order 2")
+    if n % 2 == 1:
+        return make_square(n)
+    if n % 4 == 0:
+        return make_doubly_even(n)
+    return make_singly_even(n)
+
+# Build the same squares as make_magic_square in a NumPy array using
+# index arithmetic on whole rows instead of walking the square. With a
+# path the square is written to a memory-mapped .npy file
+def make_square_np(n, path=None):
+    if n == 2:
+        raise ValueError("there is no magic square of order 2")
+    dtype = np.uint32 if n * n < 2 ** 32 else np.uint64
+    if path is None:
+        square = np.empty((n, n), dtype=dtype)
+    else:
+        square = np.lib.format.open_memmap(path, mode="w+", dtype=dtype,
+                                           shape=(n, n))
+    if n % 2 == 1:
+        fill_odd_np(square, n)
+    elif n % 4 == 0:
+        fill_doubly_even_np(square, n)
+    else:
+        fill_singly_even_np(square, n)
+    if path is not None:
+        square.flush()
+    return square
+
+# Fill an odd NumPy square with the same values as make_square. In
+# closed form square[i][j] = n * ((j - i + n // 2) % n) + (2j - i) % n + 1,
+# so every row is two cyclic shifts of fixed rows, taken as slices of
+# the fixed rows written out twice
+def fill_odd_np(square, n):
+    j = np.arange(n, dtype=square.dtype)
+    high = np.tile(n * ((j + n // 2) % n), 2)
+    low = np.tile((2 * j) % n + 1, 2)
+    half = (n + 1) // 2     # inverse of 2 modulo n
+    for i in range(n):
+        a = n - i
+        b = n - (i * half) % n
+        np.add(high[a:a + n], low[b:b + n], out=square[i])
+
+# Fill a doubly-even NumPy square. Row i is i * n + 1 + j, or its
+# complement n^2 - i * n - j on the flipped cells, which only depend on
+# i % 4: so each row is i * n * sign + base for one of four fixed rows
+def fill_doubly_even_np(square, n):
+    j = np.arange(n, dtype=np.int64)
+    row = np.empty(n, dtype=np.int64)
+    signs, bases = [], []
+    for r in range(4):
+        flip = (j % 4 == r) | (j % 4 + r == 3)
+        signs.append(np.where(flip, -1, 1))
+        bases.append(np.where(flip, n * n - j, j + 1))
+    for i in range(n):
+        np.multiply(signs[i % 4], i * n, out=row)
+        row += bases[i % 4]
+        square[i] = row
+
+# Fill a singly-even NumPy square in place by Strachey's method
+def fill_singly_even_np(square, n):
+    h = n // 2
+    m = (n - 2) // 4
+    fill_odd_np(square[:h, :h], h)
+    for qi, qj, k in ((1, 1, 1), (0, 1, 2), (1, 0, 3)):
+        quadrant = square[qi * h:(qi + 1) * h, qj * h:(qj + 1) * h]
+        quadrant[:] = square[:h, :h]
+        quadrant += k * h * h
+    for cols in (slice(0, m), slice(n - (m - 1), n)):
+        top = square[:h, cols].copy()
+        square[:h, cols] = square[h:, cols]
+        square[h:, cols] = top
+    # The middle row swaps columns 1..m instead of 0..m-1
+    for j in (0, m):
+        square[m, j], square[m + h, j] = square[m + h, j], square[m, j]
+
 # Print the magic square
 def print_square(magic_square):
     for row in magic_square:
@@ -45,17 +163,105 @@ def check_square(magic_square):
 
     return True
 
+# Check a square given as blocks of consecutive rows, (first row, rows),
+# and return a description of the first problem found or None if it is
+# magic. Rows are checked as they arrive; column and diagonal sums are
+# accumulated and checked at the end
+def find_error_in_rows(blocks, n):
+    expected = n * (n ** 2 + 1) // 2
+    seen = np.zeros(n * n + 1, dtype=bool)
+    filled = 0
+    col_sums = np.zeros(n, dtype=np.int64)
+    diag_sum = anti_sum = 0
+    for start, block in blocks:
+        block = np.ascontiguousarray(block, dtype=np.int64)
+        k = block.shape[0]
+
+        # Values must be a permutation of 1..n^2
+        bad = (block < 1) | (block > n * n)
+        if bad.any():
+            i, j = np.argwhere(bad)[0]
+            return "row %d holds %d, outside 1..%d" % (
+                start + i, block[i, j], n * n)
+        values = block.ravel()
+        repeated = seen[values]
+        seen[values] = True
+        filled += len(values)
+        if np.count_nonzero(seen) != filled:
+            # Some value repeats; mark every later copy within the block
+            order = np.argsort(values, kind="stable")
+            later = order[1:][values[order[1:]] == values[order[:-1]]]
+            repeated[later] = True
+        if repeated.any():
+            flat = np.argmax(repeated)
+            return "row %d repeats %d" % (start + flat // n, values[flat])
+
+        row_sums = block.sum(axis=1)
+        if (row_sums != expected).any():
+            i = np.argmax(row_sums != expected)
+            return "row %d sums to %d, expected %d" % (
+                start + i, row_sums[i], expected)
+        col_sums += block.sum(axis=0)
+
+        # Diagonal cells are strided views of the flattened block
+        diag_sum += int(values[start::n + 1][:k].sum())
+        if n > 1:
+            anti_sum += int(values[n - 1 - start::n - 1][:k].sum())
+        else:
+            anti_sum += int(values.sum())
+
+    if (col_sums != expected).any():
+        j = np.argmax(col_sums != expected)
+        return "column %d sums to %d, expected %d" % (j, col_sums[j], expected)
+    if diag_sum != expected:
+        return "main diagonal sums to %d, expected %d" % (diag_sum, expected)
+    if anti_sum != expected:
+        return "anti-diagonal sums to %d, expected %d" % (anti_sum, expected)
+    return None
+
+# Vectorized check of a square held in memory (nested lists or a NumPy
+# array): returns None if it is magic, else the first problem found
+def find_square_error(square):
+    a = np.asarray(square)
+    if a.ndim != 2 or a.shape[0] != a.shape[1]:
+        return "not a square"
+    return find_error_in_rows([(0, a)], a.shape[0])
+
+# Check a square saved as a .npy file without loading it: the file is
+# memory-mapped and read rows_per_chunk rows at a time
+def find_square_file_error(path, rows_per_chunk=1024):
+    a = np.load(path, mmap_mode="r")
+    if a.ndim != 2 or a.shape[0] != a.shape[1]:
+        return "not a square"
+    n = a.shape[0]
+    blocks = ((start, a[start:start + rows_per_chunk])
+              for start in range(0, n, rows_per_chunk))
+    return find_error_in_rows(blocks, n)
+
+# Map every number 1..n^2 to its (row, col) in one pass over the
+# square; entry 0 is unused
+def position_index(square):
+    index = [None] * (len(square) ** 2 + 1)
+    for i, row in enumerate(square):
+        for j, value in enumerate(row):
+            index[value] = (i, j)
+    return index
+
 # Calculate the sum of adjacent numbers for a given number n in the square
-def sum_adjacent_numbers(square, n):
+# (looked up in index from position_index if given, else found by scanning)
+def sum_adjacent_numbers(square, n, index=None):
     if n < 1 or n > len(square) ** 2:
         return 0
 
     n_row, n_col = None, None
 
-    for i in range(len(square)):
-        for j in range(len(square)):
-            if square[i][j] == n:
-                n_row, n_col = i, j
+    if index is not None:
+        n_row, n_col = index[n]
+    else:
+        for i in range(len(square)):
+            for j in range(len(square)):
+                if square[i][j] == n:
+                    n_row, n_col = i, j
 
     adjacent_sum = 0
 
@@ -66,6 +272,33 @@ def sum_adjacent_numbers(square, n):
 
     return adjacent_sum
 
+# Sum of the (up to 8) neighbors of every cell as a NumPy array: add up
+# the eight shifted views of a copy of the square padded with zeros
+def neighbor_sums(square):
+    a = np.asarray(square, dtype=np.int64)
+    n = a.shape[0]
+    padded = np.zeros((n + 2, n + 2), dtype=np.int64)
+    padded[1:-1, 1:-1] = a
+    sums = np.zeros_like(a)
+    for di in range(3):
+        for dj in range(3):
+            if (di, dj) != (1, 1):
+                sums += padded[di:di + n, dj:dj + n]
+    return sums
+
+# Answer a whole batch of sum_adjacent_numbers queries: neighbor sums
+# and the value -> cell index are built once in O(n^2), after which
+# each query is a single lookup. Numbers outside 1..n^2 give 0
+def sum_adjacent_batch(square, queries):
+    a = np.asarray(square)
+    n = a.shape[0]
+    sums = neighbor_sums(a).ravel()
+    cell = np.zeros(n * n + 1, dtype=np.int64)
+    cell[a.ravel()] = np.arange(n * n)
+    q = np.asarray(queries, dtype=np.int64)
+    valid = (q >= 1) & (q <= n * n)
+    return np.where(valid, sums[cell[np.where(valid, q, 0)]], 0)
+
 
 def main():
     n_str = sys.stdin.readline().strip()  # Read n as a string from stdin
@@ -74,11 +307,10 @@ def main():
 
     numbers = [int(line.strip()) for line in sys.stdin]  # Read numbers from stdin
 
-    magic_square = make_square(n)
+    magic_square = make_magic_square(n)
     print_square(magic_square)
 
-    for num in numbers:
-        adjacent_sum = sum_adjacent_numbers(magic_square, num)
+    for adjacent_sum in sum_adjacent_batch(magic_square, numbers):
         print(adjacent_sum)
 
 
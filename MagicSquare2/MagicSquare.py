@@ -23,13 +23,21 @@
 
 #  Date Last Modified: 10/13/2023
 
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from fractions import Fraction
+from functools import lru_cache
+from itertools import permutations, repeat
+from operator import mul
+
 
 #  Input: 1-D list of integers a
 #  Output: returns True if this list is a magic square
 #          or False otherwise
 def is_magic ( a ):
     # Establish magic constant
-    magic_constant = 3 * (((3 ** 2) + 1) / 2)
+    magic_constant = 3 * ((3 ** 2) + 1) // 2
 
     # Check for each row, column, and diagonals
     # in which sums are compared to magic constant
@@ -67,6 +75,248 @@ def permute ( a, idx ):
         a[idx], a[i] = a[i], a[idx]
 
 
+#  Input: order n
+#  Output: the lines (rows, columns and both diagonals) of an n x n
+#          square, each as a list of indices into the 1-D list
+def magic_lines(n):
+    rows = [[r * n + c for c in range(n)] for r in range(n)]
+    cols = [[r * n + c for r in range(n)] for c in range(n)]
+    diagonals = [[i * n + i for i in range(n)],
+                 [i * n + n - 1 - i for i in range(n)]]
+    return rows + cols + diagonals
+
+
+#  Input: order n, its lines and the set of cells already filled
+#  Output: dict of the empty cells whose value the line sums force,
+#          each as (denominator, constant, cells, coefficients) with
+#          value * denominator = constant + sum(coefficient * cell value).
+#          The last empty cell of a line is the simplest case; solving
+#          the line equations also finds cells fixed by several lines
+def forced_cells(n, lines, known):
+    magic = n * (n * n + 1) // 2
+    empty = [c for c in range(n * n) if c not in known]
+
+    # One equation per line: coefficients of the empty cells, constant
+    # and coefficients of the filled cells, reduced by Gauss-Jordan
+    equations = []
+    for line in lines:
+        equations.append(([Fraction(int(c in line)) for c in empty],
+                          Fraction(magic),
+                          {c: Fraction(-1) for c in line if c in known}))
+    rank = 0
+    for j in range(len(empty)):
+        pivot = None
+        for i in range(rank, len(equations)):
+            if equations[i][0][j]:
+                pivot = i
+                break
+        if pivot is None:
+            continue
+        equations[rank], equations[pivot] = equations[pivot], equations[rank]
+        coefs, const, filled = equations[rank]
+        p = coefs[j]
+        coefs = [x / p for x in coefs]
+        const = const / p
+        filled = {c: x / p for c, x in filled.items()}
+        equations[rank] = (coefs, const, filled)
+        for i in range(len(equations)):
+            f = equations[i][0][j]
+            if i == rank or not f:
+                continue
+            coefs2, const2, filled2 = equations[i]
+            filled2 = dict(filled2)
+            for c, x in filled.items():
+                filled2[c] = filled2.get(c, 0) - f * x
+            equations[i] = ([x - f * y for x, y in zip(coefs2, coefs)],
+                            const2 - f * const,
+                            {c: x for c, x in filled2.items() if x})
+        rank += 1
+
+    forced = {}
+    for coefs, const, filled in equations[:rank]:
+        nonzero = [j for j, x in enumerate(coefs) if x]
+        if len(nonzero) == 1:
+            denom = 1
+            for x in [const] + list(filled.values()):
+                denom = math.lcm(denom, x.denominator)
+            cells = sorted(filled)
+            forced[empty[nonzero[0]]] = (
+                denom, int(const * denom), cells,
+                [int(filled[c] * denom) for c in cells])
+    return forced
+
+
+#  Input: order n and cells to fill first
+#  Output: the order in which to fill the cells, as a list of
+#          (cell, rule, lines completed by this cell). rule is None for
+#          a cell that is searched, or a forced_cells rule for a cell
+#          that is computed. After the start cells, each searched cell
+#          is the one forcing the most others, preferring diagonal cells
+@lru_cache(maxsize=None)
+def search_plan(n, start=()):
+    lines = magic_lines(n)
+    degree = [sum(c in line for line in lines) for c in range(n * n)]
+    known = set()
+    plan = []
+    while len(known) < n * n:
+        best = None
+        for c in list(start) + list(range(n * n)):
+            if c in known:
+                continue
+            forced = forced_cells(n, lines, known | {c})
+            if c in start:
+                best = (None, c, forced)
+                break
+            key = (len(forced), degree[c])
+            if best is None or key > best[0]:
+                best = (key, c, forced)
+        key, c, forced = best
+        for cell, rule in [(c, None)] + sorted(forced.items()):
+            known.add(cell)
+            done = [line for line in lines
+                    if cell in line and all(x in known for x in line)]
+            plan.append((cell, rule, done))
+    return plan
+
+
+#  Input: order n
+#  Output: pairs of corners (smaller, larger) that hold in exactly one
+#          of the 8 rotations and reflections of a square: the top-left
+#          corner is the smallest, and top-right is below bottom-left
+def canonical_pairs(n):
+    if n == 1:
+        return []
+    top_left, top_right = 0, n - 1
+    bottom_left, bottom_right = n * (n - 1), n * n - 1
+    return [(top_left, top_right), (top_left, bottom_left),
+            (top_left, bottom_right), (top_right, bottom_left)]
+
+
+#  Input: order n, optional dict of cells with fixed values, and whether
+#         to keep only the canonical orientation (see canonical_pairs)
+#  Output: yields every such n x n magic square as a 1-D list. Cells are
+#          filled by backtracking in the order of search_plan; forced
+#          cells are computed rather than searched, and a branch is
+#          dropped as soon as a value is out of range or used, or a
+#          completed line misses the integer magic constant
+def magic_squares(n, fixed=None, canonical=False):
+    size = n * n
+    magic = n * (size + 1) // 2
+    fixed = fixed or {}
+    plan = search_plan(n, tuple(sorted(fixed)))
+    a = [0] * size
+    get = a.__getitem__
+
+    # Corner comparisons to make as soon as both corners are filled
+    pairs = canonical_pairs(n) if canonical else []
+    known = set()
+    ordered = []
+    for cell, rule, done in plan:
+        known.add(cell)
+        ordered.append([(x, y) for x, y in pairs
+                        if cell in (x, y) and x in known and y in known])
+
+    def search(k, unused):
+        if k == len(plan):
+            yield list(a)
+            return
+        cell, rule, done = plan[k]
+        if rule is None:
+            values = unused
+            if cell in fixed:
+                values &= 1 << (fixed[cell] - 1)
+            while values:
+                bit = values & -values     # unused values as a bitmask
+                values ^= bit
+                a[cell] = bit.bit_length()
+                for line in done:
+                    if sum(map(get, line)) != magic:
+                        break
+                else:
+                    for x, y in ordered[k]:
+                        if a[x] > a[y]:
+                            break
+                    else:
+                        yield from search(k + 1, unused ^ bit)
+        else:
+            denom, const, cells, coefs = rule
+            v, r = divmod(const + sum(map(mul, coefs, map(get, cells))), denom)
+            if r or not 0 < v <= size or not unused >> (v - 1) & 1:
+                return
+            if fixed.get(cell, v) != v:
+                return
+            a[cell] = v
+            for line in done:
+                if sum(map(get, line)) != magic:
+                    return
+            for x, y in ordered[k]:
+                if a[x] > a[y]:
+                    return
+            yield from search(k + 1, unused ^ (1 << (v - 1)))
+
+    yield from search(0, (1 << size) - 1)
+
+
+#  Input: 1-D list of integers a holding an n x n square
+#  Output: list of its 8 rotations and reflections, starting with a
+def symmetries(a):
+    n = math.isqrt(len(a))
+    images = []
+    for t in range(8):
+        b = [0] * len(a)
+        for i in range(n):
+            for j in range(n):
+                r, c = (j, i) if t & 4 else (i, j)
+                if t & 1:
+                    r = n - 1 - r
+                if t & 2:
+                    c = n - 1 - c
+                b[r * n + c] = a[i * n + j]
+        images.append(b)
+    return images
+
+
+#  Input: order n
+#  Output: every first row that a canonical magic square can have
+def first_rows(n):
+    size = n * n
+    magic = n * (size + 1) // 2
+    rows = []
+    for head in permutations(range(1, size + 1), n - 1):
+        last = magic - sum(head)
+        if 0 < last <= size and last not in head:
+            row = head + (last,)
+            if n == 1 or row[0] < row[-1]:
+                rows.append(row)
+    return rows
+
+
+#  Worker for canonical_magic_squares: the canonical squares of order
+#  n whose first row is row
+def canonical_squares_with_row(n, row):
+    return list(magic_squares(n, dict(enumerate(row)), canonical=True))
+
+
+#  Input: order n, a function called with each square found, and the
+#         number of worker processes (default: all cores)
+#  Output: returns how many squares were found. Only one square of
+#          each set of 8 rotations and reflections is kept. The search
+#          is split by first row across a process pool, and squares are
+#          passed to writer in first-row order as each part finishes
+def canonical_magic_squares(n, writer, workers=None):
+    rows = first_rows(n)
+    workers = workers or os.cpu_count() or 1
+    chunksize = max(1, len(rows) // (workers * 8))
+    count = 0
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for squares in executor.map(canonical_squares_with_row, repeat(n),
+                                    rows, chunksize=chunksize):
+            for a in squares:
+                writer(a)
+                count += 1
+    return count
+
+
 #  Input: 1-D list of integers a
 #  Output: prints this as a 2-D list
 def print_square(a):
@@ -23,7 +23,15 @@
 #  Date Last Modified: 11/3/23
 
 
+import argparse
+import os
+import random
 import sys
+import tempfile
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
 
 class Queue (object):
   def __init__ (self):
@@ -68,7 +76,422 @@ def radix_sort(a):
 
     return a
 
+# Characters allowed in the words, in sort order
+ALPHABET = "0123456789abcdefghijklmnopqrstuvwxyz"
+
+# Input: list of strings a and the alphabet they are written in, or
+#        None for code point order over any characters
+# Output: list of indices that puts a in sorted order (stable)
+def lsd_radix_order(a, alphabet=ALPHABET):
+    if alphabet is None:
+        return _code_point_radix_order(a)
+    if len(alphabet) > 254:
+        raise ValueError('alphabet too large for byte codes')
+    n = len(a)
+    radix = len(alphabet) + 1
+
+    # Translate every word to bytes once; code 0 means "past the end
+    # of the word", so a shorter word sorts before its extensions
+    table = {ord(c): i + 1 for i, c in enumerate(alphabet)}
+    allowed = set(alphabet)
+    keys = []
+    for word in a:
+        if not allowed.issuperset(word):
+            raise ValueError('%r has characters outside the alphabet' % word)
+        keys.append(bytes(word.translate(table), 'latin-1'))
+    max_len = max((len(k) for k in keys), default=0)
+
+    # One counting-sort pass per character position, right to left,
+    # moving indices into a preallocated list instead of queues
+    order = list(range(n))
+    out = [0] * n
+    for i in range(max_len - 1, -1, -1):
+        digits = [k[i] if i < len(k) else 0 for k in keys]
+        count = [0] * radix
+        for d in digits:
+            count[d] += 1
+        start = [0] * radix
+        for d in range(1, radix):
+            start[d] = start[d - 1] + count[d - 1]
+        for idx in order:
+            d = digits[idx]
+            out[start[d]] = idx
+            start[d] += 1
+        order, out = out, order
+
+    return order
+
+# Input: list of strings a
+# Output: list of indices that puts a in code point order (stable); each
+#         pass ranks only the characters that occur at that position, so
+#         the counting sort stays small whatever the characters are
+def _code_point_radix_order(a):
+    n = len(a)
+    max_len = max((len(word) for word in a), default=0)
+    order = list(range(n))
+    out = [0] * n
+    for i in range(max_len - 1, -1, -1):
+        # 0 is "past the end of the word", as in lsd_radix_order
+        codes = [ord(word[i]) + 1 if i < len(word) else 0 for word in a]
+        rank = {c: r for r, c in enumerate(sorted(set(codes)))}
+        digits = [rank[c] for c in codes]
+        count = [0] * len(rank)
+        for d in digits:
+            count[d] += 1
+        start = [0] * len(rank)
+        for d in range(1, len(rank)):
+            start[d] = start[d - 1] + count[d - 1]
+        for idx in order:
+            d = digits[idx]
+            out[start[d]] = idx
+            start[d] += 1
+        order, out = out, order
+
+    return order
+
+# Input: list of strings a
+# Output: a new list with the strings of a in sorted order
+def lsd_radix_sort(a, alphabet=ALPHABET):
+    return [a[i] for i in lsd_radix_order(a, alphabet)]
+
+# Input: NumPy integer array a
+# Output: stable sorting permutation of a as an int64 array. Keys are
+#         mapped to unsigned 64 bit (flipping the sign bit of signed
+#         types) and sorted a byte at a time; bytes that are the same
+#         for every key are skipped
+def _numpy_radix_order(a):
+    import numpy as np
+
+    if a.dtype.kind not in 'iu':
+        raise TypeError('radix order needs an integer array, not %s' % a.dtype)
+    if a.dtype.kind == 'i':
+        keys = a.astype(np.int64).view(np.uint64) ^ np.uint64(1 << 63)
+    else:
+        keys = a.astype(np.uint64)
+    order = np.arange(len(keys), dtype=np.int64)
+    for shift in range(0, 64, 8):
+        digits = ((keys[order] >> np.uint64(shift)) & np.uint64(0xFF))
+        digits = digits.astype(np.uint8)
+        if len(digits) == 0 or digits.min() == digits.max():
+            continue
+        # Stable argsort of one byte is a counting sort in NumPy
+        order = order[np.argsort(digits, kind='stable')]
+    return order
+
+# Input: sequence of integers a (list, array.array or NumPy array),
+#        negative values allowed
+# Output: stable sorting permutation of a, as array('q') (or a NumPy
+#         int64 array for NumPy input). Keys are offset by the minimum
+#         and sorted a byte at a time with counting sort
+def int_radix_order(a):
+    if hasattr(a, 'dtype'):
+        return _numpy_radix_order(a)
+    n = len(a)
+    if n == 0:
+        return array('q')
+    low = min(a)
+    keys = [x - low for x in a]
+    order = list(range(n))
+    out = [0] * n
+    for shift in range(0, max(keys).bit_length(), 8):
+        digits = [(k >> shift) & 0xFF for k in keys]
+        count = [0] * 256
+        for d in digits:
+            count[d] += 1
+        start = [0] * 256
+        for d in range(1, 256):
+            start[d] = start[d - 1] + count[d - 1]
+        for idx in order:
+            d = digits[idx]
+            out[start[d]] = idx
+            start[d] += 1
+        order, out = out, order
+    return array('q', order)
+
+# Input: sequence of integers a (list, array.array or NumPy array)
+# Output: the integers of a sorted, in the same kind of container
+def int_radix_sort(a):
+    order = int_radix_order(a)
+    if hasattr(a, 'dtype'):
+        return a[order]
+    if isinstance(a, array):
+        return array(a.typecode, [a[i] for i in order])
+    return [a[i] for i in order]
+
+# Input: list of records and a function giving each record's key, a
+#        string or an integer; strings are ordered by code point unless
+#        an alphabet is given
+# Output: stable sorting permutation as array('q') (NumPy int64 for a
+#         NumPy key array), so columnar data can be reordered with one
+#         gather instead of moving records
+def radix_argsort(records, key=None, alphabet=None):
+    keys = records if key is None else [key(r) for r in records]
+    if len(keys) and isinstance(keys[0], str):
+        return array('q', lsd_radix_order(keys, alphabet))
+    return int_radix_order(keys)
+
+# Buckets this small are finished with insertion sort
+MSD_CUTOFF = 16
+
+# Input: list of strings a, start and end of a slice that shares its
+#        first depth characters, and a key function for the rest
+# Output: sorts that slice in place by insertion
+def insertion_sort(a, lo, hi, key):
+    keys = [key(w) for w in a[lo:hi]]
+    for i in range(1, hi - lo):
+        w, k = a[lo + i], keys[i]
+        j = i - 1
+        while j >= 0 and keys[j] > k:
+            a[lo + j + 1] = a[lo + j]
+            keys[j + 1] = keys[j]
+            j -= 1
+        a[lo + j + 1] = w
+        keys[j + 1] = k
+
+# Input: list of strings a, an optional alphabet giving the character
+#        order (default: Unicode code point order)
+# Output: a new sorted list. Most significant character first: each
+#         bucket is split on its next character only while it has more
+#         than cutoff words, and words that end at the current depth are
+#         final and never looked at again
+def msd_radix_sort(a, alphabet=None, cutoff=MSD_CUTOFF):
+    a = list(a)
+    if alphabet is None:
+        key = str
+        char_key = None
+    else:
+        rank = {c: i for i, c in enumerate(alphabet)}
+        for word in a:
+            if not rank.keys() >= set(word):
+                raise ValueError('%r has characters outside the alphabet'
+                                 % word)
+        char_key = rank.__getitem__
+
+        def key(word):
+            return tuple(map(char_key, word))
+
+    # An explicit stack of (lo, hi, depth) slices instead of recursion,
+    # so very long keys cannot hit the recursion limit
+    stack = [(0, len(a), 0)]
+    while stack:
+        lo, hi, depth = stack.pop()
+        if hi - lo <= cutoff:
+            insertion_sort(a, lo, hi, key)
+            continue
+
+        done = []
+        buckets = {}
+        for word in a[lo:hi]:
+            if len(word) == depth:
+                done.append(word)
+            else:
+                c = word[depth]
+                if c in buckets:
+                    buckets[c].append(word)
+                else:
+                    buckets[c] = [word]
+
+        a[lo:lo + len(done)] = done
+        pos = lo + len(done)
+        for c in sorted(buckets, key=char_key):
+            bucket = buckets[c]
+            a[pos:pos + len(bucket)] = bucket
+            if len(bucket) > 1:
+                stack.append((pos, pos + len(bucket), depth + 1))
+            pos += len(bucket)
+
+    return a
+
+# Buckets larger than this many bytes are split again on disk
+EXTERNAL_MEMORY = 64 << 20
+
+# Bytes a word costs while its bucket is sorted in memory, beyond the str
+# object itself: the slots holding it in the bucket list, in the copy
+# msd_radix_sort works on and in that sort's per-character buckets
+WORD_OVERHEAD = 32
+
+# Input: a word
+# Output: about how many bytes it takes up while sorted in memory
+def word_cost(word):
+    return sys.getsizeof(word) + WORD_OVERHEAD
+
+# Input: iterable of words that all share their first depth characters,
+#        a directory for temporary files and the character order
+# Output: writes the words in sorted order to out, one per line. Words
+#         are spilled to one temporary file per character at depth,
+#         reading the input chunk_lines at a time; each bucket whose
+#         words take at most max_bytes of memory (by word_cost) is sorted
+#         in memory, larger ones are split again on their next character
+def external_bucket_sort(words, depth, tmpdir, out, alphabet=None,
+                         max_bytes=EXTERNAL_MEMORY, chunk_lines=1 << 16):
+    rank = None if alphabet is None else {c: i for i, c in enumerate(alphabet)}
+    ended = 0       # words equal to the shared prefix
+    files = {}
+    sizes = {}
+    words = iter(words)
+    # Chunks are also kept to a quarter of max_bytes, sized from the
+    # average cost of the words read so far
+    lines = max(1, min(chunk_lines, max_bytes // 4 // (WORD_OVERHEAD + 64)))
+    try:
+        while True:
+            chunk = list(islice(words, lines))
+            if not chunk:
+                break
+            cost = sum(map(word_cost, chunk)) // len(chunk)
+            lines = max(1, min(chunk_lines, max_bytes // 4 // cost))
+            for word in chunk:
+                if len(word) == depth:
+                    ended += 1
+                    prefix = word
+                    continue
+                c = word[depth]
+                if c not in files:
+                    if rank is not None and c not in rank:
+                        raise ValueError('%r has characters outside the '
+                                         'alphabet' % word)
+                    fd, path = tempfile.mkstemp(dir=tmpdir, suffix='.run')
+                    files[c] = (open(fd, 'w', encoding='utf-8'), path)
+                    sizes[c] = 0
+                files[c][0].write(word + '\n')
+                sizes[c] += word_cost(word)
+    finally:
+        for f, path in files.values():
+            f.close()
+
+    for _ in range(ended):
+        out.write(prefix + '\n')
+
+    for c in sorted(files, key=None if rank is None else rank.__getitem__):
+        path = files[c][1]
+        with open(path, encoding='utf-8') as f:
+            if sizes[c] <= max_bytes:
+                bucket = [line.rstrip('\n') for line in f]
+                for word in msd_radix_sort(bucket, alphabet):
+                    out.write(word + '\n')
+            else:
+                lines = (line.rstrip('\n') for line in f)
+                external_bucket_sort(lines, depth + 1, tmpdir, out, alphabet,
+                                     max_bytes, chunk_lines)
+        os.remove(path)
+
+# Input: file of words, one per line, and a file to write them to
+# Output: sorts words larger than memory through temporary bucket files
+#         holding at most about max_bytes of words in memory at a time
+def external_radix_sort(infile, outfile, alphabet=None,
+                        max_bytes=EXTERNAL_MEMORY, tmpdir=None):
+    with tempfile.TemporaryDirectory(dir=tmpdir) as workdir:
+        words = (line.rstrip('\n') for line in infile)
+        external_bucket_sort(words, 0, workdir, outfile, alphabet, max_bytes)
+
+# Input: bytes holding newline-separated words and the character order
+# Output: the same words sorted and packed the same way. Workers get
+#         and return one bytes object rather than a pickled list
+def sort_packed(data, alphabet=None):
+    words = data.decode('utf-8').split('\n')
+    return '\n'.join(msd_radix_sort(words, alphabet)).encode('utf-8')
+
+# Input: list of words, number of partitions wanted and prefix length
+# Output: list of partitions (lists of words) whose key ranges are
+#         contiguous and in order. Words are counted by their first
+#         prefix_len characters and consecutive prefixes are grouped
+#         until a partition holds about len(words) / parts words, so one
+#         common letter is split across many partitions
+def partition_words(words, parts, alphabet=None, prefix_len=2):
+    groups = {}
+    for word in words:
+        prefix = word[:prefix_len]
+        if prefix in groups:
+            groups[prefix].append(word)
+        else:
+            groups[prefix] = [word]
+
+    if alphabet is None:
+        key = None
+    else:
+        rank = {c: i for i, c in enumerate(alphabet)}
+
+        def key(prefix):
+            return [rank[c] for c in prefix]
+
+    target = max(1, len(words) // max(1, parts))
+    partitions = []
+    current = []
+    for prefix in sorted(groups, key=key):
+        current.extend(groups[prefix])
+        if len(current) >= target:
+            partitions.append(current)
+            current = []
+    if current:
+        partitions.append(current)
+    return partitions
+
+# Input: list of words, number of worker processes
+# Output: a new sorted list. Partitions of the key range are packed into
+#         bytes and sorted in a process pool, then concatenated in order
+def parallel_radix_sort(words, workers=None, alphabet=None):
+    workers = workers or os.cpu_count() or 1
+    partitions = partition_words(words, workers * 4, alphabet)
+    packed = ['\n'.join(part).encode('utf-8') for part in partitions]
+    result = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for data in executor.map(sort_packed, packed,
+                                 [alphabet] * len(packed)):
+            result.extend(data.decode('utf-8').split('\n'))
+    return result
+
+# Input: number of words and a random seed
+# Output: list of random words whose lengths follow a long-tailed
+#         (Pareto) distribution: mostly short, a few very long
+def skewed_words(num_words, seed=0, alphabet=ALPHABET):
+    rng = random.Random(seed)
+    words = []
+    for _ in range(num_words):
+        length = min(int(rng.paretovariate(1.1) * 3), 1000)
+        words.append(''.join(rng.choice(alphabet) for _ in range(length)))
+    return words
+
+# Time the LSD and MSD sorts on the same skewed word list
+def benchmark(num_words, seed=0):
+    words = skewed_words(num_words, seed)
+    lengths = sorted(len(w) for w in words)
+    print("%d words, median length %d, max length %d"
+          % (num_words, lengths[num_words // 2], lengths[-1]))
+    expected = None
+    for name, sort in (("LSD", lsd_radix_sort), ("MSD", msd_radix_sort)):
+        start = time.time()
+        result = sort(words)
+        finish = time.time()
+        if expected is None:
+            expected = result
+        elif result != expected:
+            raise AssertionError("%s sort disagrees with LSD" % name)
+        print("%s radix sort: %.3f s" % (name, finish - start))
+
 def main():
+    parser = argparse.ArgumentParser(description="Radix sort words")
+    parser.add_argument("--msd", action="store_true",
+                        help="sort most significant character first")
+    parser.add_argument("--benchmark", type=int, metavar="N",
+                        help="compare LSD and MSD on N skewed random words")
+    parser.add_argument("--external", action="store_true",
+                        help="sort through temporary files in bounded "
+                             "memory, printing one word per line")
+    parser.add_argument("--memory", type=int, default=EXTERNAL_MEMORY,
+                        help="bytes of memory for the words sorted at once")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="sort partitions in this many processes "
+                             "(0 = all cores)")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark(args.benchmark)
+        return
+
+    if args.external:
+        sys.stdin.readline()    # the word count is not needed
+        external_radix_sort(sys.stdin, sys.stdout, ALPHABET, args.memory)
+        return
+
     line = sys.stdin.readline().strip()
     num_words = int(line)
 
@@ -77,7 +500,13 @@ def main():
         line = sys.stdin.readline().strip()
         word_list.append(line)
 
-    sorted_list = radix_sort(word_list)
+    if args.workers != 1:
+        sorted_list = parallel_radix_sort(word_list, args.workers or None,
+                                          ALPHABET)
+    elif args.msd:
+        sorted_list = msd_radix_sort(word_list, ALPHABET)
+    else:
+        sorted_list = lsd_radix_sort(word_list)
     print(sorted_list)
 
 
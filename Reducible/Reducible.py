@@ -1,4 +1,13 @@
+import argparse
+import hashlib
+import mmap
+import os
+import struct
 import sys
+import zlib
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
 
 def is_prime(n):
     if n < 2:
@@ -22,7 +31,310 @@ def step_size(s, const):
         hash_idx = (hash_idx * 26 + letter_val) % const
     return const - (hash_idx % const)
 
+# Open-addressing set of words with double hashing.  Each word's hash is
+# computed once and kept next to it, so lookups compare hashes before
+# strings and growing never rehashes a word.  The size is always prime
+# and the step lies in 1..size-1, so every probe sequence visits the
+# whole table and always meets an empty slot
+class HashTable:
+    def __init__(self, size=11, max_load=0.7):
+        self.size = size if is_prime(size) else find_next_prime(size)
+        self.max_load = max_load
+        self.count = 0
+        self.keys = [None] * self.size
+        self.hashes = array('q', bytes(8 * self.size))
+        self.operations = 0
+        self.total_probes = 0
+        self.max_probes = 0
+
+    # Index of s in the table, or of the empty slot where it would go;
+    # the probe counts feed stats() unless record is False
+    def slot(self, s, h, record=True):
+        size = self.size
+        keys = self.keys
+        hashes = self.hashes
+        index = h % size
+        step = 1 + (h // size) % (size - 1)
+        probes = 1
+        key = keys[index]
+        while key is not None and (hashes[index] != h or key != s):
+            index = (index + step) % size
+            key = keys[index]
+            probes += 1
+        if record:
+            self.operations += 1
+            self.total_probes += probes
+            if probes > self.max_probes:
+                self.max_probes = probes
+        return index
+
+    def grow(self):
+        old = [(key, h) for key, h in zip(self.keys, self.hashes) if key is not None]
+        self.size = find_next_prime(2 * self.size)
+        self.keys = [None] * self.size
+        self.hashes = array('q', bytes(8 * self.size))
+        for key, h in old:
+            index = self.slot(key, h, record=False)
+            self.keys[index] = key
+            self.hashes[index] = h
+
+    def add(self, s):
+        h = hash(s)
+        index = self.slot(s, h)
+        if self.keys[index] is None:
+            if self.count + 1 > self.max_load * self.size:
+                self.grow()
+                index = self.slot(s, h, record=False)
+            self.keys[index] = s
+            self.hashes[index] = h
+            self.count += 1
+
+    def __contains__(self, s):
+        return self.keys[self.slot(s, hash(s))] is not None
+
+    def __len__(self):
+        return self.count
+
+    def stats(self):
+        return {
+            'size': self.size,
+            'count': self.count,
+            'load': self.count / self.size,
+            'mean_probes': self.total_probes / max(1, self.operations),
+            'max_probes': self.max_probes,
+        }
+
+DAWG_MAGIC = b'DAWG'
+DAWG_HEADER = struct.Struct('<4sIII')
+NO_CHILD = (1 << 30) - 1
+ENDS_WORD = 1 << 30
+
+class DawgNode:
+    __slots__ = ('final', 'edges', 'number')
+
+    def __init__(self):
+        self.final = False
+        self.edges = {}
+        self.number = None
+
+    def signature(self):
+        return self.final, tuple((ch, child.number) for ch, child in sorted(self.edges.items()))
+
+# Builds a minimized DAWG of the words (sorted insertion, merging equal
+# suffix states as soon as they are finished) and writes it to path.
+# File: header (magic, word count, root node, flags), then pairs of
+# uint32.  A node is a run of pairs: (edge count, 0) followed by one
+# (code point, child node | ENDS_WORD) per edge, sorted by code point,
+# where ENDS_WORD marks that the path through the edge spells a word
+def build_dawg(word_list, path):
+    words = sorted(set(word_list))
+    root = DawgNode()
+    register = {}
+    unchecked = []
+
+    def minimize(depth):
+        while len(unchecked) > depth:
+            parent, ch, child = unchecked.pop()
+            key = child.signature()
+            if key in register:
+                parent.edges[ch] = register[key]
+            else:
+                child.number = len(register)
+                register[key] = child
+
+    previous = ''
+    for word in words:
+        common = 0
+        while common < min(len(word), len(previous)) and word[common] == previous[common]:
+            common += 1
+        minimize(common)
+        node = unchecked[-1][2] if unchecked else root
+        for ch in word[common:]:
+            child = DawgNode()
+            node.edges[ch] = child
+            unchecked.append((node, ch, child))
+            node = child
+        node.final = True
+        previous = word
+    minimize(0)
+
+    # Lay out the nodes children first so every child index is known,
+    # with an explicit stack since words can be longer than the
+    # recursion limit
+    records = array('I')
+    placed = {}
+    stack = [(root, False)]
+    while stack:
+        node, ready = stack.pop()
+        if not node.edges or id(node) in placed:
+            continue
+        if not ready:
+            stack.append((node, True))
+            stack.extend((child, False) for child in node.edges.values())
+            continue
+        edges = sorted(node.edges.items())
+        placed[id(node)] = len(records) // 2
+        records.extend((len(edges), 0))
+        for ch, child in edges:
+            target = placed[id(child)] if child.edges else NO_CHILD
+            records.extend((ord(ch), target | (ENDS_WORD if child.final else 0)))
+    start = placed[id(root)] if root.edges else NO_CHILD
+
+    if len(records) // 2 >= NO_CHILD:
+        raise ValueError('dictionary is too large for the DAWG format')
+    if sys.byteorder != 'little':
+        records.byteswap()
+
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(DAWG_HEADER.pack(DAWG_MAGIC, len(words), start, ENDS_WORD if root.final else 0))
+        f.write(records.tobytes())
+    os.replace(tmp, path)
+
+# Read-only word set over a DAWG file built by build_dawg.  The file is
+# memory-mapped and walked in place through a uint32 view, so opening
+# costs nothing and concurrent runs share the page cache
+class MappedDictionary:
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.count, self.root, self.flags = DAWG_HEADER.unpack_from(self.map)
+        if magic != DAWG_MAGIC or sys.byteorder != 'little':
+            self.map.close()
+            raise ValueError(path + ' is not a readable DAWG dictionary')
+        self.records = memoryview(self.map)[DAWG_HEADER.size:].cast('I')
+
+    def __len__(self):
+        return self.count
+
+    def walk(self, s, node=None):
+        # Returns the node reached after reading s from node (the root by
+        # default), with ENDS_WORD set if the path spells a word, or None
+        # when the path leaves the dictionary
+        records = self.records
+        if node is None:
+            node = self.root | self.flags
+        for ch in s:
+            node &= NO_CHILD
+            if node == NO_CHILD:
+                return None
+            code = ord(ch)
+            lo = node + 1
+            hi = lo + records[2 * node]
+            while lo < hi:
+                mid = (lo + hi) // 2
+                if records[2 * mid] < code:
+                    lo = mid + 1
+                else:
+                    hi = mid
+            if lo == node + 1 + records[2 * node] or records[2 * lo] != code:
+                return None
+            node = records[2 * lo + 1]
+        return node
+
+    def __contains__(self, s):
+        node = self.walk(s)
+        return node is not None and bool(node & ENDS_WORD)
+
+    def has_prefix(self, prefix):
+        node = self.walk(prefix)
+        return node is not None and node != NO_CHILD
+
+    def words_with_prefix(self, prefix=''):
+        node = self.walk(prefix)
+        if node is None:
+            return
+        if node & ENDS_WORD:
+            yield prefix
+
+        # Depth-first, pushing each node's edges in reverse so the words
+        # come out in sorted order
+        records = self.records
+        stack = [(prefix, node & NO_CHILD)]
+        while stack:
+            word, node = stack.pop()
+            if node & ENDS_WORD and word != prefix:
+                yield word
+            node &= NO_CHILD
+            if node == NO_CHILD:
+                continue
+            first = node + 1
+            for i in range(first + records[2 * node] - 1, first - 1, -1):
+                stack.append((word + chr(records[2 * i]), records[2 * i + 1]))
+
+    def edges(self, node):
+        # Returns the (code point, child) pairs leaving node
+        node &= NO_CHILD
+        if node == NO_CHILD:
+            return ()
+        records = self.records
+        first = node + 1
+        return [(records[2 * i], records[2 * i + 1])
+                for i in range(first, first + records[2 * node])]
+
+    def reducible_words(self):
+        # Grows the reducible words upward from the empty word: a word of
+        # length L + 1 is reducible when deleting one letter gives a
+        # reducible word of length L, so every candidate is one letter
+        # inserted into a reducible word.  Insertions are followed through
+        # the DAWG, so only the nodes near reducible words are ever read,
+        # never the rest of the dictionary
+        tables = {}
+        pairs = {}
+
+        def table(node):
+            # letter -> child for the edges leaving node
+            node &= NO_CHILD
+            if node not in tables:
+                tables[node] = {chr(code): child for code, child in self.edges(node)}
+            return tables[node]
+
+        def pair_table(node):
+            # letter -> [(inserted letter, grandchild)], so an insertion
+            # before that letter is found without trying every edge
+            key = node & NO_CHILD
+            if key not in pairs:
+                found = {}
+                for ch, child in table(node).items():
+                    for letter, grandchild in table(child).items():
+                        found.setdefault(letter, []).append((ch, grandchild))
+                pairs[key] = found
+            return pairs[key]
+
+        root = self.root | self.flags
+        found = {''} if root & ENDS_WORD else set()
+        level = {''}
+        while level:
+            longer = set()
+            for word in level:
+                node = root
+                for i in range(len(word)):
+                    head, rest = word[:i], word[i + 1:]
+                    for ch, child in pair_table(node).get(word[i], ()):
+                        for letter in rest:
+                            edges = tables.get(child & NO_CHILD) or table(child)
+                            child = edges.get(letter)
+                            if child is None:
+                                break
+                        else:
+                            if child & ENDS_WORD:
+                                longer.add(head + ch + word[i:])
+                    node = table(node)[word[i]]
+                for ch, child in table(node).items():
+                    if child & ENDS_WORD:
+                        longer.add(word + ch)
+            found |= longer
+            level = longer
+        return found
+
+    def close(self):
+        self.records.release()
+        self.map.close()
+
 def insert_word(s, hash_table):
+    if isinstance(hash_table, HashTable):
+        hash_table.add(s)
+        return
     index = hash_word(s, len(hash_table))
     if hash_table[index] == '':
         hash_table[index] = s
@@ -34,6 +346,8 @@ def insert_word(s, hash_table):
         hash_table[(index + step * num_steps) % len(hash_table)] = s
 
 def find_word(s, hash_table):
+    if isinstance(hash_table, (HashTable, MappedDictionary)):
+        return s in hash_table
     index = hash_word(s, len(hash_table))
     if hash_table[index] == s:
         return True
@@ -62,6 +376,236 @@ def is_reducible(s, hash_table, hash_memo):
         return False
 
 
+def find_reducible_words(word_list):
+    by_length = {}
+    for word in word_list:
+        by_length.setdefault(len(word), set()).add(word)
+
+    # Level by level: a word is reducible when one of its deletions is a
+    # reducible word one letter shorter, starting from the empty word
+    reducible = {''}
+    found = set(by_length.get(0, ()))
+    for length in range(1, max(by_length, default=0) + 1):
+        level = set()
+        for word in by_length.get(length, ()):
+            for i in range(length):
+                if word[:i] + word[i + 1:] in reducible:
+                    level.add(word)
+                    break
+        if not level:
+            break
+        found |= level
+        reducible = level
+    return found
+
+MEMO_MAGIC = b'RMEM'
+MEMO_HEADER = struct.Struct('<4s32sII')
+
+def dictionary_fingerprint(keys):
+    # keys: the sorted distinct words
+    return hashlib.sha256('\n'.join(keys).encode('utf-8')).digest()
+
+# Memo file: header (magic, fingerprint, word count, key block length),
+# the sorted words newline-joined and zlib-compressed, then one bit per
+# word in the same order, set when the word is reducible
+def save_memo(path, fingerprint, keys, reducible):
+    block = zlib.compress('\n'.join(keys).encode('utf-8'), 1)
+    bits = ''.join('1' if word in reducible else '0' for word in reversed(keys))
+    bitmap = int(bits or '0', 2).to_bytes((len(keys) + 7) // 8, 'little')
+
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(MEMO_HEADER.pack(MEMO_MAGIC, fingerprint, len(keys), len(block)))
+        f.write(block)
+        f.write(bitmap)
+    os.replace(tmp, path)
+
+# Returns (fingerprint, sorted words, reducible words), or (None, [], set())
+# when the file is missing, damaged or incomplete
+def load_memo(path):
+    missing = None, [], set()
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+        magic, fingerprint, count, size = MEMO_HEADER.unpack_from(data)
+        start = MEMO_HEADER.size
+        text = zlib.decompress(data[start:start + size]).decode('utf-8')
+    except (OSError, struct.error, zlib.error, UnicodeDecodeError):
+        return missing
+
+    keys = text.split('\n') if count else []
+    bitmap = data[start + size:]
+    if magic != MEMO_MAGIC or len(keys) != count or len(bitmap) != (count + 7) // 8:
+        return missing
+
+    bits = bin(int.from_bytes(bitmap, 'little'))[:1:-1]
+    reducible = {word for word, bit in zip(keys, bits) if bit == '1'}
+    return fingerprint, keys, reducible
+
+# Returns the reducible words of word_list from the answers for
+# old_words, or None as soon as the lookups still needed would exceed
+# budget, since a full recompute is cheaper by then
+def update_reducible(old_words, old_reducible, word_list, budget=None):
+    words = word_list if isinstance(word_list, set) else set(word_list)
+    reducible = old_reducible & words
+    if '' in words:
+        reducible.add('')
+    added = {}
+    for word in words - old_words:
+        added.setdefault(len(word), []).append(word)
+    flipped = {}
+    for word in old_reducible - words:
+        flipped.setdefault(len(word), []).append(word)
+    if not added and not flipped:
+        return reducible
+
+    letters = set(''.join(words))
+    spent = 0
+
+    # Only new words and words one letter longer than a word whose answer
+    # changed are recomputed; everything else keeps its cached answer
+    length = 1
+    while length <= max(max(added, default=0), max(flipped, default=-1) + 1):
+        spent += length * (len(added.get(length, ())) + len(letters) * len(flipped.get(length - 1, ())))
+        if budget is not None and spent > budget:
+            return None
+        dirty = set(added.get(length, ()))
+        for shorter in flipped.get(length - 1, ()):
+            for i in range(length):
+                for letter in letters:
+                    word = shorter[:i] + letter + shorter[i:]
+                    if word in words:
+                        dirty.add(word)
+        for word in dirty:
+            now = length == 1 or any(word[:i] + word[i + 1:] in reducible for i in range(length))
+            if now:
+                reducible.add(word)
+            else:
+                reducible.discard(word)
+            if now != (word in old_reducible):
+                flipped.setdefault(length, []).append(word)
+        length += 1
+    return reducible
+
+def cached_reducible_words(word_list, path):
+    words = set(word_list)
+    keys = sorted(words)
+    fingerprint = dictionary_fingerprint(keys)
+    old_fingerprint, old_keys, old_reducible = load_memo(path)
+
+    if old_fingerprint == fingerprint:
+        return old_reducible
+
+    # An update may spend an eighth of the lookups of a full pass (one per
+    # letter of the dictionary); a diff that spreads further than that is
+    # recomputed, losing at most that eighth
+    reducible = None
+    if old_keys:
+        budget = sum(map(len, keys)) // 8
+        reducible = update_reducible(set(old_keys), old_reducible, words, budget)
+    if reducible is None:
+        reducible = find_reducible_words(keys)
+
+    save_memo(path, fingerprint, keys, reducible)
+    return reducible
+
+# Sorted words packed into one shared memory block: the byte length,
+# then the UTF-8 words, each followed by a newline.  Other processes
+# attach by name and decode the whole block, or a byte range of it that
+# starts and ends on word boundaries, so no word is ever pickled
+class SharedWords:
+    def __init__(self, word_list=None, name=None):
+        if name is None:
+            data = ''.join(word + '\n' for word in sorted(word_list)).encode('utf-8')
+            self.shm = shared_memory.SharedMemory(create=True, size=8 + len(data))
+            struct.pack_into('<q', self.shm.buf, 0, len(data))
+            self.shm.buf[8:8 + len(data)] = data
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.size = struct.unpack_from('<q', self.shm.buf, 0)[0]
+
+    def words(self, start=0, end=None):
+        end = self.size if end is None else end
+        return self.shm.buf[8 + start:8 + end].tobytes().decode('utf-8').split('\n')[:-1]
+
+    def as_set(self):
+        return set(self.words())
+
+    # Byte ranges cutting the block into about parts pieces on word
+    # boundaries
+    def shards(self, parts):
+        data = self.shm.buf[8:8 + self.size].tobytes()
+        bounds = [0]
+        for i in range(1, parts):
+            cut = data.find(b'\n', max(bounds[-1], i * len(data) // parts))
+            if cut == -1:
+                break
+            if cut + 1 > bounds[-1]:
+                bounds.append(cut + 1)
+        if bounds[-1] < len(data):
+            bounds.append(len(data))
+        return list(zip(bounds, bounds[1:]))
+
+    def close(self):
+        self.shm.close()
+
+    def unlink(self):
+        self.shm.unlink()
+
+_shared_level = (None, set())
+
+def reducible_shard(task):
+    # Checks one byte range of level L against the reducible words of
+    # level L - 1, decoding that level's shared block once per worker
+    global _shared_level
+    shorter_name, level_name, start, end = task
+    if _shared_level[0] != shorter_name:
+        shorter = SharedWords(name=shorter_name)
+        _shared_level = (shorter_name, shorter.as_set())
+        shorter.close()
+    level = SharedWords(name=level_name)
+    shard = level.words(start, end)
+    level.close()
+    reducible = _shared_level[1]
+    return [word for word in shard
+            if any(word[:i] + word[i + 1:] in reducible for i in range(len(word)))]
+
+def parallel_reducible_words(word_list, workers=None):
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        return find_reducible_words(word_list)
+
+    by_length = {}
+    for word in word_list:
+        by_length.setdefault(len(word), set()).add(word)
+
+    # Same levels as find_reducible_words.  Each level and the reducible
+    # words one letter shorter are published in shared memory, and the
+    # workers get byte ranges of the level to check
+    reducible = {''}
+    found = set(by_length.get(0, ()))
+    with ProcessPoolExecutor(workers) as pool:
+        for length in range(1, max(by_length, default=0) + 1):
+            shorter = SharedWords(reducible)
+            level = SharedWords(by_length.get(length, ()))
+            try:
+                tasks = [(shorter.shm.name, level.shm.name, start, end)
+                         for start, end in level.shards(4 * workers)]
+                reducible = {word for shard in pool.map(reducible_shard, tasks) for word in shard}
+            finally:
+                for block in (shorter, level):
+                    block.close()
+                    block.unlink()
+            if not reducible:
+                break
+            found |= reducible
+    return found
+
+def check_words(words, hash_table):
+    hash_memo = set()
+    for word in words:
+        print(word, is_reducible(word, hash_table, hash_memo))
+
 def get_longest_words(string_list):
     if not string_list:
         return []
@@ -75,26 +619,53 @@ def find_next_prime(n):
             return n
 
 def main():
-    word_list = []
-
-    for line in sys.stdin:
-        word_list.append(line.strip())
+    parser = argparse.ArgumentParser()
+    parser.add_argument('memo', nargs='?', help='file caching results across runs')
+    parser.add_argument('-w', '--workers', type=int, help='number of worker processes')
+    parser.add_argument('-d', '--dictionary', help='use a DAWG file built with --build instead of stdin')
+    parser.add_argument('--build', metavar='PATH', help='write the words on stdin to a DAWG file and exit')
+    parser.add_argument('-c', '--check', nargs='+', metavar='WORD', help='only report whether these words are reducible')
+    args = parser.parse_args()
 
-    load_factor = 0.7
-    N = int(len(word_list) / load_factor)
-    N = find_next_prime(N)
-
-    hash_table = ['' for _ in range(N)]
+    word_list = []
 
-    M = int(0.2 * len(word_list)) + 1
-    M = find_next_prime(M)
+    if args.dictionary:
+        if args.workers or args.memo or args.build:
+            parser.error('--dictionary cannot be combined with other options')
+        dictionary = MappedDictionary(args.dictionary)
+        if args.check:
+            check_words(args.check, dictionary)
+        else:
+            word_list = sorted(dictionary.reducible_words())
+        dictionary.close()
+        if args.check:
+            return
+    else:
+        for line in sys.stdin:
+            word_list.append(line.strip())
 
-    hash_memo = set()
+    if args.check:
+        hash_table = HashTable(len(word_list))
+        for word in word_list:
+            insert_word(word, hash_table)
+        check_words(args.check, hash_table)
+        return
 
-    for word in word_list:
-        insert_word(word, hash_table)
+    if args.build:
+        build_dawg(word_list, args.build)
+        return
+    if args.workers and args.memo:
+        parser.error('--workers cannot be combined with a memo file')
 
-    reducible_words = [word for word in word_list if is_reducible(word, hash_table, hash_memo)]
+    if args.dictionary:
+        reducible = set(word_list)
+    elif args.workers:
+        reducible = parallel_reducible_words(word_list, args.workers)
+    elif args.memo:
+        reducible = cached_reducible_words(word_list, args.memo)
+    else:
+        reducible = find_reducible_words(word_list)
+    reducible_words = [word for word in word_list if word in reducible]
     longest_reducible_words = get_longest_words(reducible_words)
 
     longest_reducible_words.sort()
@@ -52,9 +52,11 @@ def linear_search(n: int, k: int) -> int:
 
 # Input: int n, the number of lines of code to write
 #        int k, the productivity factor
+#        callable lines, the count to search (lines_before_asleep unless
+#        a wrapper is passed in, e.g. to count probes)
 # Output: the number of lines of code that must be 
 #         written before the first cup of coffee
-def binary_search (n: int, k: int) -> int:
+def binary_search (n: int, k: int, lines=lines_before_asleep) -> int:
     # Establish pointers and v (lines before coffee)
     left, right = 1, n
     v = 0
@@ -62,7 +64,7 @@ def binary_search (n: int, k: int) -> int:
     # Create binary search algorithm
     while left <= right:
         mid = left + (right - left) // 2
-        lines_written = lines_before_asleep(mid, k)
+        lines_written = lines(mid, k)
 
         if lines_written >= n:
             v = mid
@@ -73,6 +75,239 @@ def binary_search (n: int, k: int) -> int:
     return v
 
 
+# Input: int n, the number of lines of code to write
+#        int k, the productivity factor
+# Output: the lower and upper end of a window that must hold the answer;
+#         lines_before_asleep(v, k) is at least v and below v * k / (k - 1),
+#         and the floor at each of the T = log_k(n) divisions loses less
+#         than one line, so the answer is within T + 3 of n * (k - 1) / k
+def search_bracket(n: int, k: int):
+    low = n * (k - 1) // k
+    terms = 0
+    power = 1
+    while power <= n:
+        power *= k
+        terms += 1
+    return low, min(n, low + terms + 3)
+
+
+# Input: int n, the number of lines of code to write
+#        int k, the productivity factor
+#        dict cache, optional map v -> lines_before_asleep(v, k) for this
+#        k, shared between calls to reuse earlier probes
+# Output: (v, probes) where v equals binary_search(n, k) and probes is the
+#         number of lines_before_asleep evaluations that were not cached
+def galloping_search(n: int, k: int, cache=None):
+    if cache is None:
+        cache = {}
+    probes = 0
+
+    def lines(v):
+        nonlocal probes
+        if v not in cache:
+            cache[v] = lines_before_asleep(v, k)
+            probes += 1
+        return cache[v]
+
+    low, high = search_bracket(n, k)
+
+    # The bracket should always hold; fall back to the full search if not
+    if lines(high) < n or (low > 0 and lines(low) >= n):
+        return binary_search(n, k), probes + n.bit_length()
+
+    # Gallop up from low: low always fails, so widen the step until a
+    # probe succeeds and then binary search the last gap
+    step = 1
+    while low + step < high and lines(low + step) < n:
+        low += step
+        step *= 2
+    high = min(high, low + step)
+
+    while high - low > 1:
+        mid = low + (high - low) // 2
+        if lines(mid) >= n:
+            high = mid
+        else:
+            low = mid
+
+    return high, probes
+
+
+# Input: int n, the number of lines of code to write
+#        int k, the productivity factor
+# Output: (v, galloping probes, binary search probes) for comparing the
+#         two searches on the same query; binary_search runs unchanged
+#         with a wrapper that counts its calls
+def compare_probes(n: int, k: int):
+    v, probes = galloping_search(n, k)
+
+    binary_probes = 0
+
+    def counted(v, k):
+        nonlocal binary_probes
+        binary_probes += 1
+        return lines_before_asleep(v, k)
+
+    binary_search(n, k, counted)
+    return v, probes, binary_probes
+
+
+# Input: int k, the productivity factor
+# Output: the model v -> lines written before falling asleep, for use
+#         with monotone_search
+def work_model(k: int):
+    return lambda v: lines_before_asleep(v, k)
+
+
+# Input: callable f, non-decreasing over the domain
+#        target, the value f must reach
+#        low, a point of the domain to start from (f is not needed below it)
+#        integer, True for an integer domain, False for real numbers
+#        tolerance, relative width at which a real search stops
+#        memo, a dict shared between calls (or True for a fresh one)
+#              caching f(v) by v
+#        max_doublings, how far the bracket may grow before giving up
+# Output: the smallest v >= low with f(v) >= target (for reals, a v within
+#         tolerance above it); the upper end is found by doubling the step
+#         from low, so no upper bound has to be known in advance
+def monotone_search(f, target, low=0, integer=True, tolerance=1e-9,
+                    memo=None, max_doublings=4096):
+    if memo is True:
+        memo = {}
+    if memo is not None:
+        model = f
+
+        def f(v):
+            if v not in memo:
+                memo[v] = model(v)
+            return memo[v]
+
+    if f(low) >= target:
+        return low
+
+    # Bracket: low always fails, grow the step until high succeeds
+    step = 1 if integer else max(1.0, abs(low))
+    high = low + step
+    doublings = 0
+    while f(high) < target:
+        doublings += 1
+        if doublings > max_doublings or high == float("inf"):
+            raise ValueError("target is never reached")
+        low = high
+        step *= 2
+        high = low + step
+
+    if integer:
+        while high - low > 1:
+            mid = low + (high - low) // 2
+            if f(mid) >= target:
+                high = mid
+            else:
+                low = mid
+    else:
+        while high - low > tolerance * max(1.0, abs(high)):
+            mid = low + (high - low) / 2
+            if mid == low or mid == high:
+                break
+            if f(mid) >= target:
+                high = mid
+            else:
+                low = mid
+
+    return high
+
+
+# Input: callable f and an iterable of targets, plus any monotone_search
+#        keyword arguments
+# Output: list of monotone_search answers in the order of targets; the
+#         targets are solved in increasing order so each search starts
+#         from the previous answer, and all of them share one memo
+def monotone_search_batch(f, targets, low=0, memo=True, **options):
+    targets = list(targets)
+    if memo is True:
+        memo = {}
+    answers = [None] * len(targets)
+
+    for i in sorted(range(len(targets)), key=targets.__getitem__):
+        low = monotone_search(f, targets[i], low=low, memo=memo, **options)
+        answers[i] = low
+
+    return answers
+
+
+# Input: NumPy array (or sequence) v and k, either one per lane or a
+#        single k shared by every lane
+# Output: array of lines_before_asleep(v[i], k[i]) for every lane,
+#         dividing all lanes at once and dropping lanes as they reach zero
+def batch_lines_before_asleep(v, k):
+    import numpy as np
+
+    v = np.array(v, dtype=np.int64)
+    k = np.broadcast_to(np.asarray(k, dtype=np.int64), v.shape)
+    lines_written = np.zeros_like(v)
+    lanes = np.arange(v.size)
+
+    while v.size:
+        lines_written[lanes] += v
+        v = v // k
+        alive = v != 0
+        if not alive.all():
+            lanes, v, k = lanes[alive], v[alive], k[alive]
+
+    return lines_written
+
+
+# Input: arrays n and k, one query per lane
+# Output: array of binary_search(n[i], k[i]), found by one binary search
+#         run in lockstep over all lanes; each lane starts from the
+#         search_bracket window (at most 67 wide for int64 n), so there
+#         are only a handful of vectorized steps whatever the queries.
+#         The line counts in that window reach n + 134, so lanes with n
+#         above BATCH_MAX_N would overflow int64 and use binary_search
+BATCH_MAX_N = 2 ** 63 - 256
+
+
+def batch_binary_search(n, k):
+    import numpy as np
+
+    n = np.asarray(n, dtype=np.int64)
+    k = np.broadcast_to(np.asarray(k, dtype=np.int64), n.shape)
+    v = np.zeros_like(n)
+    large = n > BATCH_MAX_N
+    for i in np.flatnonzero(large):
+        v.flat[i] = binary_search(int(n.flat[i]), int(k.flat[i]))
+    # n * (k - 1) // k without overflow, and 64 bounds log_k(n) + 1
+    low = n - (-(-n // k))
+    left = np.maximum(low, 1)
+    right = np.minimum(n, low + 67)
+    right[large] = 0
+    lanes = np.flatnonzero(left <= right)
+
+    while lanes.size:
+        lo, hi = left[lanes], right[lanes]
+        mid = lo + (hi - lo) // 2
+        enough = batch_lines_before_asleep(mid, k[lanes]) >= n[lanes]
+        v[lanes[enough]] = mid[enough]
+        right[lanes[enough]] = mid[enough] - 1
+        left[lanes[~enough]] = mid[~enough] + 1
+        lanes = lanes[left[lanes] <= right[lanes]]
+
+    return v
+
+
+# Reads every case from stdin at once (same input format as main) and
+# prints the binary search answer for each, one per line
+def batch_main():
+    import numpy as np
+
+    data = np.array(sys.stdin.read().split(), dtype=np.int64)
+    num_cases = data[0]
+    cases = data[1:1 + 2 * num_cases].reshape(num_cases, 2)
+
+    for v in batch_binary_search(cases[:, 0], cases[:, 1]):
+        print(v)
+
+
 # main has been completed for you
 # do NOT change anything below this line
 def main():